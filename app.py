@@ -2,6 +2,18 @@
 import streamlit as st
 import os
 import io
+import functools
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import cv2
+import torch
+try:
+    import onnxruntime as ort
+    import onnx # torch.onnx.export needs it to write the models
+except ImportError: # onnxruntime and onnx are optional; OCR then stays on PyTorch
+    ort = None
+import easyocr
 from easyocr import Reader
 from PIL import Image, ImageDraw, ImageFont
 from deep_translator import GoogleTranslator
@@ -21,6 +33,32 @@ st.info("Upload an image, select the languages, and see the translated text over
 # Font for rendering text. Place the .ttf file in the same folder.
 FONT_PATH = "DejaVuSans.ttf" 
 
+# Draw a light outline around each erased text box (useful for debugging box placement)
+SHOW_BOX_OUTLINES = False
+
+# For targets whose text is plain ASCII, render with OpenCV's built-in Hershey font, which is
+# much faster than Pillow's FreeType rendering. Other scripts (and accented letters) need the TTF,
+# so e.g. Spanish or French stay on Pillow. The choice is made per block: on a Hershey target,
+# blocks that aren't ASCII (e.g. failed translations keeping the original text) or that Hershey
+# can't fit fall back to the TTF, so one image can mix both fonts.
+FAST_ASCII_RENDERING = True
+HERSHEY_TARGET_LANGS = {"en"}
+HERSHEY_FONT = cv2.FONT_HERSHEY_SIMPLEX
+# Hershey glyphs are ~22px tall at scale 1.0, about the cap height of a 30px TTF font
+HERSHEY_PX_PER_SCALE = 30.0
+
+# Run the CRAFT detector and CRNN recognizer in fp16 when a CUDA GPU is used
+USE_FP16_ON_GPU = True
+
+# On CPU-only hosts, run OCR models through ONNX Runtime (if installed) instead of PyTorch.
+# The models are exported once into ONNX_MODEL_DIR and reused on later runs; exports are kept
+# per EasyOCR version, so upgrading it (and its weights) re-exports instead of reusing stale models.
+USE_ONNX_RUNTIME_ON_CPU = True
+ONNX_MODEL_DIR = "onnx_models"
+
+# Longest image side (px) fed to OCR; larger uploads are downscaled before detection
+MAX_OCR_SIDE = 1600
+
 # Language Mappings (Expand as needed)
 # Mapping display names to EasyOCR codes
 ocr_lang_map = {
@@ -50,8 +88,185 @@ translator_lang_map = {
     "Italian": "it",
     # Add more languages supported by deep-translator: https://deep-translator.readthedocs.io/en/latest/languages.html
 }
+# Mapping EasyOCR codes to GoogleTranslator codes, for languages present in both maps
+ocr_to_translator_code = {ocr_lang_map[name]: translator_lang_map[name] for name in ocr_lang_map if name in translator_lang_map}
 
-def load_font(size=15):
+class HalfPrecisionModel(torch.nn.Module):
+    """
+    Runs a model in fp16 while its callers keep passing and receiving fp32 tensors,
+    so EasyOCR's pre/post-processing (numpy, OpenCV) is unaffected.
+    """
+    def __init__(self, model):
+        super().__init__()
+        self.model = model.half()
+
+    def forward(self, *inputs):
+        inputs = [x.half() if torch.is_tensor(x) and x.is_floating_point() else x for x in inputs]
+        outputs = self.model(*inputs)
+        if isinstance(outputs, tuple):
+            return tuple(y.float() if torch.is_tensor(y) and y.is_floating_point() else y for y in outputs)
+        return outputs.float() if outputs.is_floating_point() else outputs
+
+class ColumnMeanPool(torch.nn.Module):
+    """ONNX-exportable equivalent of the recognizer's AdaptiveAvgPool2d((None, 1)): averages the last dim."""
+    def forward(self, x):
+        return x.mean(dim=3, keepdim=True)
+
+class ImageOnlyRecognizer(torch.nn.Module):
+    """Exposes the recognizer with the image as its only input (its text argument is unused)."""
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, image):
+        return self.model(image, None)
+
+class OnnxModel:
+    """
+    Stands in for one of EasyOCR's torch models by running an ONNX Runtime session.
+    Called like the torch model (extra arguments are ignored) and returns torch tensors,
+    so the rest of EasyOCR's pipeline works unchanged.
+    """
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+
+    def __call__(self, image, *unused):
+        outputs = tuple(torch.from_numpy(y) for y in self.session.run(None, {self.input_name: image.cpu().numpy()}))
+        return outputs if len(outputs) > 1 else outputs[0]
+
+    def eval(self):
+        return self
+
+def load_onnx_session(model, sample_input, path, output_names, dynamic_axes):
+    """Exports the model to path unless it's already there, then opens it with ONNX Runtime on CPU."""
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Export to a temporary file and move it into place, so an interrupted or concurrent
+        # export never leaves a partial model at path
+        fd, temp_path = tempfile.mkstemp(suffix=".onnx.tmp", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            # The TorchScript-based exporter (dynamo=False) keeps the recognizer's width dynamic
+            with torch.no_grad():
+                torch.onnx.export(
+                    model, sample_input, temp_path, input_names=["image"], output_names=output_names,
+                    dynamic_axes=dynamic_axes, opset_version=17, dynamo=False
+                )
+            os.chmod(temp_path, 0o644) # mkstemp creates the file owner-only
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+
+def use_onnx_runtime(reader, lang_codes):
+    """Replaces the reader's CRAFT detector and CRNN recognizer with ONNX Runtime sessions."""
+    model_dir = os.path.join(ONNX_MODEL_DIR, f"easyocr-{easyocr.__version__}")
+    detector_session = load_onnx_session(
+        reader.detector.eval(), torch.zeros(1, 3, 640, 640), os.path.join(model_dir, "craft.onnx"), ["y", "feature"],
+        {"image": {0: "batch", 2: "height", 3: "width"}, "y": {0: "batch", 1: "map_height", 2: "map_width"},
+         "feature": {0: "batch", 2: "map_height", 3: "map_width"}}
+    )
+
+    recognizer = reader.recognizer.eval()
+    if hasattr(recognizer, "AdaptiveAvgPool"): # Adaptive pooling doesn't export with a dynamic width
+        recognizer.AdaptiveAvgPool = ColumnMeanPool()
+    # EasyOCR feeds the recognizer 64px-high grayscale crops of varying width
+    recognizer_session = load_onnx_session(
+        ImageOnlyRecognizer(recognizer), torch.zeros(1, 1, 64, 256),
+        os.path.join(model_dir, f"recognizer_{'_'.join(lang_codes)}.onnx"), ["preds"],
+        {"image": {0: "batch", 3: "width"}, "preds": {0: "batch", 1: "sequence"}}
+    )
+
+    reader.detector = OnnxModel(detector_session)
+    reader.recognizer = OnnxModel(recognizer_session)
+
+@st.cache_resource(show_spinner=False)
+def get_reader(lang_codes, gpu):
+    """Builds the EasyOCR Reader once per language set and reuses it across reruns."""
+    use_onnx = not gpu and USE_ONNX_RUNTIME_ON_CPU and ort is not None
+    # cudnn_benchmark lets cuDNN autotune conv kernels for repeated (batched) input shapes.
+    # On CPU, quantize=True makes EasyOCR dynamically int8-quantize the detector and the
+    # recognizer's LSTM/Linear layers while loading. Quantized modules can't be exported,
+    # so the ONNX Runtime path starts from the float models instead.
+    reader = Reader(list(lang_codes), gpu=gpu, cudnn_benchmark=gpu, quantize=not use_onnx)
+    if use_onnx:
+        try:
+            use_onnx_runtime(reader, lang_codes)
+        except Exception as e:
+            st.warning(f"⚠️ Could not set up ONNX Runtime, using PyTorch for OCR instead: {e}")
+            # The float torch models are still in place (models are only swapped once both sessions
+            # load), so quantize them the way quantize=True would instead of loading the weights again
+            for model in (reader.detector, reader.recognizer):
+                if isinstance(model, torch.nn.Module):
+                    try:
+                        torch.quantization.quantize_dynamic(model, dtype=torch.qint8, inplace=True)
+                    except Exception: # As in EasyOCR: keep the float model if this host can't quantize
+                        pass
+    if gpu and USE_FP16_ON_GPU:
+        # Half precision roughly halves memory traffic and uses Tensor Cores on recent GPUs
+        # (only torch modules can be converted; e.g. the optional DBNet detector is not one)
+        if isinstance(reader.detector, torch.nn.Module):
+            reader.detector = HalfPrecisionModel(reader.detector).eval()
+        if isinstance(reader.recognizer, torch.nn.Module):
+            reader.recognizer = HalfPrecisionModel(reader.recognizer).eval()
+    return reader
+
+def run_ocr(reader, image_arrays, max_side=MAX_OCR_SIDE, on_result=None):
+    """
+    Runs paragraph-mode OCR on each decoded RGB image array and returns one result list per image.
+    If given, on_result(index, ocr_results) is called as soon as each image's results are ready,
+    so callers can start downstream work while the remaining images are still being read.
+    Images larger than max_side on their long edge are downscaled first, since CRAFT detection
+    cost grows with resolution; bboxes are mapped back to the original image coordinates.
+    Images sharing the same (OCR) dimensions go through readtext_batched together so detection
+    runs as a single batch instead of one pass per image.
+    """
+    ocr_arrays = []
+    scales = []
+    for image_array in image_arrays:
+        height, width = image_array.shape[:2]
+        scale = min(1.0, max_side / max(width, height))
+        if scale < 1.0:
+            # Keep at least 1px on the short side of very elongated images
+            ocr_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image_array = cv2.resize(image_array, ocr_size, interpolation=cv2.INTER_AREA)
+        ocr_arrays.append(image_array)
+        # Per-axis factors from the size actually produced, since rounding makes them differ slightly
+        scales.append((image_array.shape[1] / width, image_array.shape[0] / height))
+
+    all_ocr_results = [None] * len(ocr_arrays)
+    same_size_groups = {}
+    for i, image_array in enumerate(ocr_arrays):
+        same_size_groups.setdefault(image_array.shape, []).append(i)
+
+    def rescale(bbox, scale_x, scale_y):
+        try:
+            return [[p[0] / scale_x, p[1] / scale_y] for p in bbox]
+        except (IndexError, TypeError):
+            return bbox # Malformed; left as-is for the renderer to report and skip
+
+    def finish(i, ocr_results):
+        # Scale bboxes from the downscaled OCR input back to the original resolution
+        scale_x, scale_y = scales[i]
+        if scale_x != 1.0 or scale_y != 1.0:
+            ocr_results = [(rescale(bbox, scale_x, scale_y), text) for bbox, text in ocr_results]
+        all_ocr_results[i] = ocr_results
+        if on_result:
+            on_result(i, ocr_results)
+
+    for indices in same_size_groups.values():
+        if len(indices) == 1:
+            finish(indices[0], reader.readtext(ocr_arrays[indices[0]], paragraph=True, mag_ratio=1.0, canvas_size=max_side))
+            continue
+        batch = np.stack([ocr_arrays[i] for i in indices])
+        batch_results = reader.readtext_batched(batch, paragraph=True, mag_ratio=1.0, canvas_size=max_side, batch_size=8)
+        for i, ocr_results in zip(indices, batch_results):
+            finish(i, ocr_results)
+    return all_ocr_results
+
+def open_font(size=15):
     """Loads a font from the specified path, falling back to default if not found."""
     try:
         # Check if the font file exists
@@ -63,93 +278,240 @@ def load_font(size=15):
         st.warning(f"⚠️ Error loading font '{FONT_PATH}'. Using default font.")
         return ImageFont.load_default()
 
-def wrap_text_and_find_font(draw, text, box_width, box_height):
+def estimate_line_height(font):
+    """Estimates the rendered line height for a font from its metrics."""
+    # Estimate line height more accurately using font metrics if possible
+    try:
+        # Using getbbox for a sample character (adjust if needed)
+        _ , top, _ , bottom = font.getbbox("A")
+        actual_char_height = bottom - top
+        # Add some leading (adjust 1.2 multiplier as needed for spacing)
+        line_height = actual_char_height * 1.2
+        if line_height <= 0: line_height = font.size * 1.2 # Fallback
+    except AttributeError: # Fallback for older PIL/Pillow or default font
+         line_height = font.size * 1.2
+    return line_height
+
+@st.cache_resource(show_spinner=False)
+def get_font_cache():
     """
-    Finds the largest font size (minimum 12) where the text can be wrapped
-    to fit within the given box dimensions.
+    Returns (load_font, line_height_for): open_font and the font's line height, each memoized
+    per size, so the TTF is parsed and its metrics computed once per process.
+    Held in st.cache_resource to survive reruns, while each size lookup stays a plain
+    lru_cache hit (fonts are looked up for every size the fitting search tries).
     """
-    # Adjust range if needed, starting smaller might be faster sometimes
-    for size in range(40, 11, -2):  # Start medium, decrease size, stop at 12
-        font = load_font(size)
-        words = text.split()
-        if not words:
-            return font, [] # Return empty list if text is empty
+    load_font = functools.lru_cache(maxsize=None)(open_font)
 
-        # --- Efficient Word Wrapping Logic ---
-        wrapped_lines = []
-        current_line = ""
-        
+    @functools.lru_cache(maxsize=None)
+    def line_height_for(size):
+        return estimate_line_height(load_font(size))
+
+    return load_font, line_height_for
+
+load_font, line_height_for = get_font_cache()
+
+# Tiny drawing context used only for text measurement, shared by all blocks,
+# so fitting never touches the (large) image being rendered
+MEASURE_DRAW = ImageDraw.Draw(Image.new("L", (1, 1)))
+
+# Pre-warm the font cache for every size the fitting search can try
+for _size in range(12, 41, 2):
+    load_font(_size)
+
+def find_largest_fit(words, measure_words, box_width, box_height):
+    """
+    Finds the largest font size (even, 12 to 40) at which the words wrap to fit the box.
+    measure_words(size) must return (word_widths, space_width) at that size.
+    Returns (size, wrapped_lines), or None if no size fits.
+    """
+    def try_fit(size):
+        """Wraps the words at the given size; returns (size, lines) if they fit, else None."""
         # Calculate approximate line height (adjust multiplier if needed)
         # We use a fixed multiplier initially; font metrics could be more precise but complex
         line_height_approx = size * 1.2 
         max_lines = int(box_height / line_height_approx)
-        if max_lines == 0: continue # Cannot fit even one line at this size
+        if max_lines == 0: return None # Cannot fit even one line at this size
 
+        # --- Efficient Word Wrapping Logic ---
+        # Measure each word once, then break lines on the widths alone. This stays a plain loop
+        # over Python lists: it takes a few microseconds per call, far less than measuring the
+        # words, and a Numba-compiled version was no faster per call and added JIT start-up cost.
+        word_widths, space_width = measure_words(size)
+        wrapped_lines = []
+        current_words = []
+        current_width = 0
 
-        for word in words:
+        for word, word_width in zip(words, word_widths):
             # Check if adding the word exceeds width
-            test_line = current_line + (" " if current_line else "") + word
-            if draw.textlength(test_line, font=font) <= box_width:
-                current_line = test_line
+            test_width = current_width + space_width + word_width if current_words else word_width
+            if test_width <= box_width:
+                current_words.append(word)
+                current_width = test_width
             else:
+                # Check if the word itself is too long (rare case)
+                if word_width > box_width:
+                    # If a single word is too long, we might need to hyphenate or just let it overflow slightly.
+                    # For simplicity here, we'll consider it a failure for this font size.
+                    return None # Failure due to width
                 # Add the completed line
-                wrapped_lines.append(current_line)
+                wrapped_lines.append(" ".join(current_words))
                 # Check if we exceeded max lines allowed by height
                 if len(wrapped_lines) >= max_lines: 
-                    current_line = "" # Indicate failure due to height
-                    break
+                    return None # Failure due to height
                 # Start a new line with the current word
-                current_line = word
-                # Check if the new word itself is too long (rare case)
-                if draw.textlength(current_line, font=font) > box_width:
-                    # If a single word is too long, we might need to hyphenate or just let it overflow slightly.
-                    # For simplicity here, we'll consider it a failure for this font size.
-                    current_line = "" # Indicate failure due to width
-                    break
+                current_words = [word]
+                current_width = word_width
+
+        # Loop finished, add the last line and do a final height check
+        wrapped_lines.append(" ".join(current_words))
+        if len(wrapped_lines) > max_lines:
+            return None # Failed due to height on the last line
+        return size, wrapped_lines # Success! Found font size and wrapped lines
+
+    # Fitting is monotonic in font size, so binary search the even sizes 12..40
+    # for the largest one that fits instead of trying every size from the top.
+    lo, hi = 12, 40
+    best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2 & ~1
+        fitted = try_fit(mid)
+        if fitted:
+            best = fitted
+            lo = mid + 2
+        else:
+            hi = mid - 2
+    return best
 
-        # If loop finished and current_line has content, add it
-        if current_line:
-             wrapped_lines.append(current_line)
-             # Final height check after adding the last line
-             if len(wrapped_lines) > max_lines:
-                 continue # Failed due to height on the last line
+def wrap_text_and_find_font(text, box_width, box_height):
+    """
+    Finds the largest font size (minimum 12) where the text can be wrapped
+    to fit within the given box dimensions. Returns (font_size, wrapped_lines).
+    """
+    words = text.split()
+    if not words:
+        return 40, [] # Return empty list if text is empty
+
+    def measure_words(size):
+        font = load_font(size)
+        return [MEASURE_DRAW.textlength(word, font=font) for word in words], MEASURE_DRAW.textlength(" ", font=font)
 
-        # If we successfully wrapped without breaking early
-        if current_line != "": # Check if we bailed early due to width/height
-            return font, wrapped_lines # Success! Found font size and wrapped lines
+    fitted = find_largest_fit(words, measure_words, box_width, box_height)
+    if fitted:
+        return fitted
 
     # --- Fallback to smallest font size (12) if no larger size worked ---
     font = load_font(12)
     line_height_approx = 12 * 1.2
     max_lines = int(box_height / line_height_approx) if line_height_approx > 0 else 0
-    words = text.split()
     wrapped_lines = []
-    current_line = ""
+    current_words = []
+    current_width = 0
     
-    if not words: return font, [] # Handle empty text case
-    if max_lines == 0: return font, [] # Cannot fit even one line of smallest font
+    if max_lines == 0: return 12, [] # Cannot fit even one line of smallest font
 
+    word_widths = [MEASURE_DRAW.textlength(word, font=font) for word in words]
+    space_width = MEASURE_DRAW.textlength(" ", font=font)
 
-    for word in words:
-        test_line = current_line + (" " if current_line else "") + word
-        if draw.textlength(test_line, font=font) <= box_width:
-            current_line = test_line
+    for word, word_width in zip(words, word_widths):
+        test_width = current_width + space_width + word_width if current_words else word_width
+        if test_width <= box_width:
+            current_words.append(word)
+            current_width = test_width
         else:
             if len(wrapped_lines) < max_lines: # Check height *before* adding
-               wrapped_lines.append(current_line)
-               current_line = word
-               if draw.textlength(current_line, font=font) > box_width: # Single word too long
-                   # Truncate word or handle differently if needed. For now, we allow overflow.
-                   pass 
+               wrapped_lines.append(" ".join(current_words))
+               # A single word too long simply overflows. Truncate or handle differently if needed.
+               current_words = [word]
+               current_width = word_width
             else:
-                 current_line = "" # Stop adding lines if max height reached
+                 current_words = [] # Stop adding lines if max height reached
                  break
 
-    if current_line and len(wrapped_lines) < max_lines:
-        wrapped_lines.append(current_line)
+    if current_words and len(wrapped_lines) < max_lines:
+        wrapped_lines.append(" ".join(current_words))
         
     # Only return lines if we have any (prevents errors if box is too small)
-    return font, wrapped_lines if wrapped_lines else []
+    return 12, wrapped_lines if wrapped_lines else []
+
+def draw_text_hershey(pixels, text, x1, y1, box_width, box_height):
+    """
+    Wraps and draws ASCII text centered in the box directly on an RGB pixel array using
+    OpenCV's Hershey font. Returns False without drawing if the text doesn't fit at any size,
+    so the caller can fall back to the Pillow renderer.
+    """
+    words = text.split()
+    if not words:
+        return True
+
+    # Hershey text width scales linearly with the font scale, so measure each word once at scale 1.0
+    unit_word_widths = [cv2.getTextSize(word, HERSHEY_FONT, 1.0, 1)[0][0] for word in words]
+    unit_space_width = cv2.getTextSize(" ", HERSHEY_FONT, 1.0, 1)[0][0]
+
+    def measure_words(size):
+        font_scale = size / HERSHEY_PX_PER_SCALE
+        return [width * font_scale for width in unit_word_widths], unit_space_width * font_scale
+
+    fitted = find_largest_fit(words, measure_words, box_width, box_height)
+    if not fitted:
+        return False
+    size, lines_to_draw = fitted
+    font_scale = size / HERSHEY_PX_PER_SCALE
+    line_height = size * 1.2
+
+    # Center text vertically and horizontally, as in the Pillow renderer
+    total_text_height = len(lines_to_draw) * line_height
+    current_y = max(y1, y1 + (box_height - total_text_height) / 2)
+    for line in lines_to_draw:
+        (line_width, text_height), _ = cv2.getTextSize(line, HERSHEY_FONT, font_scale, 1)
+        draw_x = max(x1, x1 + (box_width - line_width) / 2)
+        # putText positions text by its baseline, not its top edge
+        cv2.putText(pixels, line, (int(draw_x), int(current_y + text_height)), HERSHEY_FONT, font_scale, (0, 0, 0), 1, cv2.LINE_AA)
+        current_y += line_height
+    return True
+
+def translate_text(text, target_lang_code):
+    """Translates a single string. A fresh translator is used per call since
+    GoogleTranslator mutates its request params and is not safe to share across threads."""
+    return GoogleTranslator(source="auto", target=target_lang_code).translate(text)
+
+@st.cache_resource(show_spinner=False)
+def get_cached_translate():
+    """
+    Returns a memoized translate_text keyed on (text, target_lang_code).
+    Held in st.cache_resource because Streamlit re-executes this script on every rerun,
+    which would otherwise throw away a plain module-level lru_cache.
+    """
+    return functools.lru_cache(maxsize=4096)(translate_text)
+
+def submit_translations(executor, texts, target_lang_code):
+    """
+    Queues translation of each text on the given executor and returns futures in input order,
+    so translation runs in the background while the caller continues (e.g. with OCR).
+    Empty texts resolve to "" and failed items resolve to the raised exception.
+    """
+    # Resolve the cache on the script thread; worker threads have no Streamlit context
+    cached_translate = get_cached_translate()
+
+    def translate_one(text):
+        if not text:
+            return ""
+        try:
+            return cached_translate(text, target_lang_code)
+        except Exception as e:
+            return e
+
+    return [executor.submit(translate_one, text) for text in texts]
+
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
+def encode_jpeg(cache_key, _image):
+    """
+    JPEG-encodes the rendered image for download. The image itself is not hashed
+    (leading underscore); cache_key must identify everything that was rendered,
+    i.e. the source image and the final text of every block.
+    """
+    output_buffer = io.BytesIO()
+    _image.save(output_buffer, format="JPEG")
+    return output_buffer.getvalue()
 
 
 # ============================================
@@ -158,7 +520,7 @@ def wrap_text_and_find_font(draw, text, box_width, box_height):
 st.sidebar.header("⚙️ Configuration")
 
 # File Uploader
-uploaded_file = st.sidebar.file_uploader("1. Upload Image", type=["png", "jpg", "jpeg"])
+uploaded_files = st.sidebar.file_uploader("1. Upload Image(s)", type=["png", "jpg", "jpeg"], accept_multiple_files=True)
 
 # Language Selection
 ocr_lang_names = list(ocr_lang_map.keys())
@@ -184,170 +546,213 @@ st.sidebar.info("The DejaVuSans.ttf font file must be in the same directory as t
 # ============================================
 # Main Execution Pipeline (Streamlit Triggered)
 # ============================================
-if uploaded_file is not None:
-    # Convert uploaded file to PIL Image
-    image_bytes = uploaded_file.getvalue()
-    original_image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-
+if uploaded_files:
     # Get language codes from selected names
     detect_lang_codes = [ocr_lang_map[name] for name in detected_langs_names if name in ocr_lang_map]
     target_lang_code = translator_lang_map.get(target_lang_name, "en") # Default to english if not found
-
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("Original Image")
-        st.image(original_image, caption="Uploaded Image", use_container_width=True)
+    # Nothing to translate when the only language being detected is already the target
+    skip_translation = len(detect_lang_codes) == 1 and ocr_to_translator_code.get(detect_lang_codes[0]) == target_lang_code
+
+    # Decode each upload once into an RGB image shared by display, OCR and drawing
+    images = []
+    for uploaded_file in uploaded_files:
+        image_bytes = uploaded_file.getvalue()
+        image_array = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        original_image = Image.fromarray(cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB))
+        images.append({"file": uploaded_file, "bytes": image_bytes, "image": original_image})
+
+    output_columns = []
+    for image in images:
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.subheader("Original Image")
+            st.image(image["image"], caption=image["file"].name, use_container_width=True)
+        output_columns.append(col2)
 
     # --- Initialize Libraries (Inside the check to use selected languages) ---
     if not detect_lang_codes:
         st.error("Please select at least one language to detect.")
     else:
+        # Translation requests are network-bound, so they run on a thread pool. It belongs to this
+        # script run (not shared between sessions) and is shut down when the run ends.
+        translation_executor = ThreadPoolExecutor(max_workers=8)
         try:
              # --- Perform OCR, Translation, and Rendering ---
              with st.spinner(f"🔄 Initializing OCR for {', '.join(detected_langs_names)}..."):
-                 reader = Reader(['hi'])
+                 reader = get_reader(tuple(sorted(detect_lang_codes)), gpu=torch.cuda.is_available())
              st.info(f"✅ OCR Engine Ready for {', '.join(detected_langs_names)}!")
 
-             with st.spinner(f"🔍 Running OCR on the image..."):
-                 start_time = time.time()
-                 # Use paragraph=True as in the original script
-                 ocr_results = reader.readtext(image_bytes, paragraph=True)
-                 ocr_time = time.time() - start_time
-             st.info(f"✅ Detected {len(ocr_results)} text blocks in {ocr_time:.2f} seconds.")
+             translation_futures = [None] * len(images)
 
-             with st.spinner(f"🌐 Translating text to {target_lang_name}..."):
+             def queue_translation(i, ocr_results):
+                 if skip_translation:
+                     return
+                 # Start translating this image's text while OCR continues on the remaining images
+                 translation_futures[i] = submit_translations(translation_executor, [text.strip() for _, text in ocr_results], target_lang_code)
+
+             with st.spinner(f"🔍 Running OCR on {len(images)} image(s)..."):
                  start_time = time.time()
-                 translator = GoogleTranslator(source="auto", target=target_lang_code)
-                 translated_blocks = []
-                 error_count = 0
-                 for i, (bbox, text) in enumerate(ocr_results):
-                     try:
-                         # Basic text cleaning (optional, can be expanded)
-                         cleaned_text = text.strip()
-                         if not cleaned_text: # Skip empty blocks
-                             translated_text = ""
+                 # Use paragraph=True as in the original script. EasyOCR converts decoded bytes to RGB
+                 # but passes arrays through as-is, so it gets the RGB pixels it was trained on
+                 all_ocr_results = run_ocr(reader, [np.asarray(image["image"]) for image in images], on_result=queue_translation)
+                 ocr_time = time.time() - start_time
+             st.info(f"✅ Detected {sum(len(r) for r in all_ocr_results)} text blocks in {ocr_time:.2f} seconds.")
+             if skip_translation:
+                 st.info(f"ℹ️ Detected language is already {target_lang_name}; keeping the original text.")
+
+             for image_index, (image, ocr_results, futures, col2) in enumerate(zip(images, all_ocr_results, translation_futures, output_columns)):
+                 uploaded_file, image_bytes, original_image = image["file"], image["bytes"], image["image"]
+
+                 with st.spinner(f"🌐 Translating text to {target_lang_name} and rendering the overlay..."):
+                     start_time = time.time()
+                     # Per-block problems are collected as (block index, message) and reported once after
+                     # rendering, instead of emitting a Streamlit element from inside the loops
+                     issues = []
+
+                     # Get bounding box coordinates for all blocks at once
+                     # Bbox from easyocr paragraph=True is [top_left, top_right, bottom_right, bottom_left]
+                     # It *should* already be sorted, but min/max ensures robustness.
+                     # Each bbox is validated on its own, so a malformed one only skips its block
+                     bboxes = np.zeros((len(ocr_results), 4, 2), dtype=np.float32)
+                     valid_bbox = np.zeros(len(ocr_results), dtype=bool)
+                     for i, (bbox, _) in enumerate(ocr_results):
+                         try:
+                             bboxes[i] = np.asarray(bbox, dtype=np.float32).reshape(4, 2)
+                             valid_bbox[i] = np.isfinite(bboxes[i]).all()
+                         except (ValueError, TypeError):
+                             pass
+                         if not valid_bbox[i]:
+                             bboxes[i] = 0 # Keep NaNs out of the coordinate math below
+                             issues.append((i, f"Skipping block with invalid bounding box format: {bbox}"))
+
+                     # Ensure coordinates are valid
+                     image_size = [original_image.width, original_image.height]
+                     top_lefts = np.clip(bboxes.min(axis=1), 0, image_size).astype(np.int32)
+                     bottom_rights = np.clip(bboxes.max(axis=1), 0, image_size).astype(np.int32)
+                     box_sizes = bottom_rights - top_lefts
+                     has_area = (box_sizes > 0).all(axis=1) & valid_bbox
+                     boxes = list(zip(top_lefts.tolist(), bottom_rights.tolist(), box_sizes.tolist()))
+
+                     # Erase original text areas with white boxes directly on a pixel array
+                     # (a fresh copy, so the original display is not altered). Boxes are known
+                     # from OCR, so this doesn't have to wait for any translation.
+                     pixels = np.array(original_image)
+                     for (x1, y1), (x2, y2) in zip(top_lefts[has_area], bottom_rights[has_area]):
+                         pixels[y1:y2 + 1, x1:x2 + 1] = 255 # Inclusive of x2/y2, like draw.rectangle
+
+                     # Basic text cleaning (optional, can be expanded)
+                     cleaned_texts = [text.strip() for _, text in ocr_results]
+                     if skip_translation:
+                         arrived_translations = enumerate(cleaned_texts)
+                     else:
+                         # Consume translations in the order they finish, so rendering work overlaps
+                         # the requests that are still in flight
+                         block_index = {future: i for i, future in enumerate(futures)}
+                         arrived_translations = ((block_index[future], future.result()) for future in as_completed(futures))
+
+                     # Draw ASCII text for ASCII-friendly targets straight onto the pixel array with OpenCV;
+                     # everything else (and anything Hershey can't fit) is laid out now and drawn with Pillow below
+                     use_hershey = FAST_ASCII_RENDERING and target_lang_code in HERSHEY_TARGET_LANGS
+                     pillow_blocks = []
+                     rendered_texts = [None] * len(ocr_results)
+                     error_count = 0
+                     for i, translated_text in arrived_translations:
+                         text = ocr_results[i][1]
+                         if isinstance(translated_text, Exception):
+                             error_count += 1
+                             translated_text = text # Keep original text on error
                          else:
-                             translated_text = translator.translate(cleaned_text)
                              if translated_text is None: # Handle None return from translator
-                                 translated_text = cleaned_text # Keep original if translation is None
-                                 st.warning(f"⚠️ Translation returned None for block {i+1}. Keeping original: '{text[:30]}...'")
-                         translated_blocks.append({"bbox": bbox, "text": translated_text if translated_text else " "}) # Use space if empty after translation
-                     except Exception as e:
-                         error_count += 1
-                         # Keep original text on error
-                         translated_blocks.append({"bbox": bbox, "text": text})
-                 translate_time = time.time() - start_time
-                 if error_count > 0:
-                      st.warning(f"⚠️ Encountered {error_count} errors during translation. Original text kept for those blocks.")
-             st.info(f"✅ Translation complete in {translate_time:.2f} seconds.")
-
-
-             with st.spinner("🎨 Rendering translated overlay..."):
-                start_time = time.time()
-                # Use a fresh copy for drawing to not alter the original display
-                img_to_draw = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-                draw = ImageDraw.Draw(img_to_draw)
-
-                for block in translated_blocks:
-                    bbox = block['bbox']
-                    text = block['text']
-
-                    # Ensure bbox points are tuples of numbers
-                    try:
-                        bbox = [(int(p[0]), int(p[1])) for p in bbox]
-                    except (ValueError, TypeError):
-                        st.warning(f"Skipping block with invalid bounding box format: {bbox}")
-                        continue
-
-
-                    # Get bounding box coordinates accurately
-                    # Bbox from easyocr paragraph=True is [top_left, top_right, bottom_right, bottom_left]
-                    # It *should* already be sorted, but min/max ensures robustness
-                    x_coords = [p[0] for p in bbox]
-                    y_coords = [p[1] for p in bbox]
-                    x1, y1 = min(x_coords), min(y_coords)
-                    x2, y2 = max(x_coords), max(y_coords)
-                    
-                    # Ensure coordinates are valid
-                    x1, y1 = max(0, x1), max(0, y1)
-                    x2, y2 = min(img_to_draw.width, x2), min(img_to_draw.height, y2)
-                    
-                    box_width = x2 - x1
-                    box_height = y2 - y1
-
-                    if box_width <= 0 or box_height <= 0:
-                        st.warning(f"Skipping block with zero width/height: {bbox}")
-                        continue # Skip if box has no area
-
-
-                    # Erase original text area with a white box
-                    draw.rectangle([(x1, y1), (x2, y2)], fill='white', outline="lightgray") # Slight outline for debug
-
-                    # Get the best font and wrapped lines
-                    final_font, lines_to_draw = wrap_text_and_find_font(draw, text, box_width, box_height)
-
-                    # Draw the new text
-                    if lines_to_draw: # Only draw if lines were successfully generated
-                        current_y = y1
-                        # Estimate line height more accurately using font metrics if possible
-                        try:
-                            # Using getbbox for a sample character (adjust if needed)
-                            _ , top, _ , bottom = final_font.getbbox("A")
-                            actual_char_height = bottom - top
-                            # Add some leading (adjust 1.2 multiplier as needed for spacing)
-                            line_height = actual_char_height * 1.2
-                            if line_height <= 0: line_height = final_font.size * 1.2 # Fallback
-                        except AttributeError: # Fallback for older PIL/Pillow or default font
-                             line_height = final_font.size * 1.2
-                             
-                        # Center text vertically (optional)
-                        total_text_height = len(lines_to_draw) * line_height
-                        start_y = y1 + (box_height - total_text_height) / 2
-                        current_y = max(y1, start_y) # Ensure text starts within the box
-
-                        for line in lines_to_draw:
-                            # Center text horizontally (optional)
-                            line_width = draw.textlength(line, font=final_font)
-                            start_x = x1 + (box_width - line_width) / 2
-                            draw_x = max(x1, start_x) # Ensure text starts within the box
-
-                            # Check if the drawing position is valid before drawing
-                            if current_y + line_height <= y2 + 5: # Allow slight overflow vertically
-                                draw.text((draw_x, current_y), line, font=final_font, fill="black")
-                            current_y += line_height
-                            if current_y > y2: # Stop if exceeding box height significantly
-                                break
-                    else:
-                        st.warning(f"Could not fit text '{text[:30]}...' into box [{x1},{y1},{x2},{y2}]. Box may be too small.")
-
-
-                render_time = time.time() - start_time
-             st.info(f"✅ Rendering complete in {render_time:.2f} seconds.")
-
-             # Convert finished image to bytes for display and download
-             output_buffer = io.BytesIO()
-             img_to_draw.save(output_buffer, format="JPEG") # Save as JPEG
-             output_bytes = output_buffer.getvalue()
-
-             with col2:
-                 st.subheader("Translated Image")
-                 st.image(output_bytes, caption=f"Translated ({target_lang_name})", use_container_width=True)
-
-                 # --- Download Button ---
-                 st.download_button(
-                     label=f"⬇️ Download Translated Image (JPG)",
-                     data=output_bytes,
-                     file_name=f"translated_{uploaded_file.name.split('.')[0]}.jpg",
-                     mime="image/jpeg"
-                 )
+                                 translated_text = cleaned_texts[i] # Keep original if translation is None
+                                 issues.append((i, f"Translation returned None for block {i+1}. Kept original: '{text[:30]}...'"))
+                             translated_text = translated_text if translated_text else " " # Use space if empty after translation
+                         rendered_texts[i] = translated_text
+
+                         if not valid_bbox[i]:
+                             continue # No usable bounding box (reported above)
+                         (x1, y1), (x2, y2), (box_width, box_height) = boxes[i]
+                         if box_width <= 0 or box_height <= 0:
+                             issues.append((i, f"Skipped block with zero width/height: [{x1},{y1},{x2},{y2}]"))
+                             continue # Skip if box has no area
+
+                         if use_hershey and translated_text.isascii() and draw_text_hershey(pixels, translated_text, x1, y1, box_width, box_height):
+                             continue
+                         # Get the best font size and wrapped lines
+                         font_size, lines_to_draw = wrap_text_and_find_font(translated_text, box_width, box_height)
+                         pillow_blocks.append((i, translated_text, font_size, lines_to_draw, x1, y1, x2, y2, box_width, box_height))
+
+                     if error_count > 0:
+                         # Not tied to one block, so it's listed after all per-block issues
+                         issues.append((len(ocr_results), f"Encountered {error_count} errors during translation. Original text kept for those blocks."))
+
+                     img_to_draw = Image.fromarray(pixels)
+                     draw = ImageDraw.Draw(img_to_draw)
+
+                     if SHOW_BOX_OUTLINES:
+                         for (x1, y1), (x2, y2) in zip(top_lefts[has_area].tolist(), bottom_rights[has_area].tolist()):
+                             draw.rectangle([(x1, y1), (x2, y2)], outline="lightgray") # Slight outline for debug
+
+                     for i, text, font_size, lines_to_draw, x1, y1, x2, y2, box_width, box_height in pillow_blocks:
+                         # Draw the new text
+                         if lines_to_draw: # Only draw if lines were successfully generated
+                             final_font = load_font(font_size)
+                             current_y = y1
+                             line_height = line_height_for(font_size)
+
+                             # Center text vertically (optional)
+                             total_text_height = len(lines_to_draw) * line_height
+                             start_y = y1 + (box_height - total_text_height) / 2
+                             current_y = max(y1, start_y) # Ensure text starts within the box
+
+                             for line in lines_to_draw:
+                                 # Center text horizontally (optional)
+                                 line_width = MEASURE_DRAW.textlength(line, font=final_font)
+                                 start_x = x1 + (box_width - line_width) / 2
+                                 draw_x = max(x1, start_x) # Ensure text starts within the box
+
+                                 # Check if the drawing position is valid before drawing
+                                 if current_y + line_height <= y2 + 5: # Allow slight overflow vertically
+                                     draw.text((draw_x, current_y), line, font=final_font, fill="black")
+                                 current_y += line_height
+                                 if current_y > y2: # Stop if exceeding box height significantly
+                                     break
+                         else:
+                             issues.append((i, f"Could not fit text '{text[:30]}...' into box [{x1},{y1},{x2},{y2}]. Box may be too small."))
+
+                     render_time = time.time() - start_time
+                 if issues:
+                     # Blocks finish in translation order, so list issues by block to keep the report stable
+                     issues.sort(key=lambda issue: issue[0])
+                     shown_issues = "\n".join(f"- {message}" for _, message in issues[:10])
+                     more_issues = f"\n- ...and {len(issues) - 10} more" if len(issues) > 10 else ""
+                     st.warning(f"⚠️ {len(issues)} issue(s) while translating and rendering {uploaded_file.name}:\n{shown_issues}{more_issues}")
+                 st.info(f"✅ Translation and rendering complete in {render_time:.2f} seconds.")
+
+                 with col2:
+                     st.subheader("Translated Image")
+                     # Pass the PIL image directly; Streamlit encodes it once for the browser
+                     st.image(img_to_draw, caption=f"Translated ({target_lang_name})", use_container_width=True)
+
+                     # --- Download Button ---
+                     st.download_button(
+                         label=f"⬇️ Download Translated Image (JPG)",
+                         data=encode_jpeg((image_bytes, tuple(sorted(detect_lang_codes)), target_lang_code, tuple(rendered_texts)), img_to_draw),
+                         file_name=f"translated_{uploaded_file.name.split('.')[0]}.jpg",
+                         mime="image/jpeg",
+                         key=f"download_{image_index}" # The same file may be uploaded more than once
+                     )
              st.success("🎉 Processing Finished!")
 
         except Exception as e:
             st.error(f"An error occurred during processing: {e}")
             import traceback
             st.error(traceback.format_exc()) # Show detailed error for debugging
+        finally:
+            # If the run was interrupted (e.g. by a rerun), drop the translations still queued
+            # instead of making later runs wait behind them
+            translation_executor.shutdown(wait=False, cancel_futures=True)
 
 else:
 
-    st.info("Please upload an image using the sidebar to start.")
+    st.info("Please upload one or more images using the sidebar to start.")